@@ -7,17 +7,19 @@ import json
 import os
 import sys
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List, Tuple, Union
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 import uvicorn
 import re
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict
 import pandas as pd
 
 import numpy as np
-from functools import lru_cache
+from functools import lru_cache, partial
 import pickle
 import hashlib
 import logging
@@ -299,6 +301,12 @@ EMOTIONAL_PATTERNS = {
     ]
 }
 
+# Compiled once so per-text scoring skips the re module's pattern cache lookups
+COMPILED_EMOTIONAL_PATTERNS = {
+    emotion: [(pattern, re.compile(pattern, re.IGNORECASE)) for pattern in patterns]
+    for emotion, patterns in EMOTIONAL_PATTERNS.items()
+}
+
 # COMPREHENSIVE COLLOQUIAL EXPRESSIONS mapping
 COLLOQUIAL_MAPPING = {
     # Color-based emotions
@@ -518,6 +526,27 @@ models_loaded = False
 analysis_cache = {}
 ai_cache = {}
 
+# Finished analyses keyed by text (LRU). Callers get a shallow copy, so setting top-level keys
+# such as 'from_cache' never leaks into the cache; nested values are shared and treated as read-only
+MOOD_CACHE_SIZE = 1024
+_MOOD_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def get_cached_mood(text: str) -> Optional[Dict[str, Any]]:
+    """Copy of the cached analysis of text, or None"""
+    result = _MOOD_CACHE.get(text)
+    if result is None:
+        return None
+    _MOOD_CACHE.move_to_end(text)
+    return dict(result)
+
+def cache_mood(text: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Store an analysis, evicting the least recently used one when full, and return a copy of it"""
+    _MOOD_CACHE[text] = result
+    _MOOD_CACHE.move_to_end(text)
+    if len(_MOOD_CACHE) > MOOD_CACHE_SIZE:
+        _MOOD_CACHE.popitem(last=False)
+    return dict(result)
+
 def revolutionary_preprocess_text(text: str) -> Dict[str, Any]:
     original_text = text
     processed_info = {
@@ -716,6 +745,12 @@ def advanced_detect_context(text: str, processed_info: Dict[str, Any]) -> List[s
     
     return detected_contexts
 
+NEGATABLE_EMOTION_REGEX = re.compile(r'\b(happy|sad|excited|angry|worried|stressed|tired|overwhelmed)\b')
+NEGATED_EMOTION_REGEXES = {
+    neg_word: re.compile(r'\b' + re.escape(neg_word) + r'\b.{0,50}\b(happy|sad|excited|angry|worried|stressed|tired|overwhelmed)\b')
+    for neg_word in ['not', 'never', 'no', 'don\'t', 'won\'t', 'can\'t', 'isn\'t', 'aren\'t']
+}
+
 def revolutionary_pattern_matching(text: str, processed_info: Dict[str, Any]) -> Dict[str, float]:
     """Revolutionary pattern matching with advanced scoring, negation handling, and intensity"""
     text_lower = text.lower()
@@ -727,12 +762,12 @@ def revolutionary_pattern_matching(text: str, processed_info: Dict[str, Any]) ->
         emotion_scores[emotion] += 0.9  # Very high confidence for colloquialisms
     
     # Phase 2: Advanced pattern matching with intensity modifiers
-    for emotion, patterns in EMOTIONAL_PATTERNS.items():
+    for emotion, patterns in COMPILED_EMOTIONAL_PATTERNS.items():
         emotion_score = 0
         pattern_matches = []
         
-        for pattern in patterns:
-            matches = list(re.finditer(pattern, text_lower, re.IGNORECASE))
+        for pattern, regex in patterns:
+            matches = list(regex.finditer(text_lower))
             match_count = len(matches)
             
             if match_count > 0:
@@ -774,15 +809,13 @@ def revolutionary_pattern_matching(text: str, processed_info: Dict[str, Any]) ->
                 negation_impact[neg_pattern] = target_emotion
     
     # Advanced negation analysis
-    negation_words = ['not', 'never', 'no', 'don\'t', 'won\'t', 'can\'t', 'isn\'t', 'aren\'t']
-    for neg_word in negation_words:
+    for neg_word, neg_regex in NEGATED_EMOTION_REGEXES.items():
         if neg_word in text_lower:
             # Find emotions within 5 words of negation
-            neg_pattern = r'\b' + re.escape(neg_word) + r'\b.{0,50}\b(happy|sad|excited|angry|worried|stressed|tired|overwhelmed)\b'
-            neg_matches = re.finditer(neg_pattern, text_lower)
+            neg_matches = neg_regex.finditer(text_lower)
             
             for match in neg_matches:
-                emotion_match = re.search(r'\b(happy|sad|excited|angry|worried|stressed|tired|overwhelmed)\b', match.group())
+                emotion_match = NEGATABLE_EMOTION_REGEX.search(match.group())
                 if emotion_match:
                     emotion_word = emotion_match.group()
                 else:
@@ -1213,33 +1246,109 @@ def ultra_advanced_sentiment_calculation(emotion_scores: Dict[str, float], text:
     
     return final_sentiment, confidence_breakdown
 
+# Texts per forward pass when several analyses share one model call
+AI_BATCH_SIZE = 32
+
+# Analyses run on these threads so the event loop stays free; NumPy/torch release the GIL while they work.
+# Pipelines share one tokenizer each, which is not safe to call concurrently, so model calls are serialized
+analysis_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="mood-analysis")
+_model_lock = threading.Lock()
+
+def get_ai_analysis(text: str) -> Dict[str, Any]:
+    """Sentiment and emotion model outputs for one text (or why they are unavailable)"""
+    if not (ML_AVAILABLE and sentiment_model and emotion_model):
+        return {'available': False, 'reason': 'AI models not loaded'}
+    try:
+        with _model_lock:
+            # Get AI sentiment analysis
+            ai_sentiment_result = sentiment_model(text)
+            
+            # Get AI emotion analysis
+            ai_emotion_result = emotion_model(text)
+        
+        return {
+            'sentiment': ai_sentiment_result,
+            'emotions': ai_emotion_result,
+            'available': True
+        }
+    except Exception as e:
+        logger.warning(f"AI analysis failed: {e}")
+        return {'available': False, 'error': str(e)}
+
+def get_ai_analyses(texts: List[str]) -> List[Dict[str, Any]]:
+    """get_ai_analysis for many texts with one batched call per model, retrying one by one on failure"""
+    if not (ML_AVAILABLE and sentiment_model and emotion_model) or not texts:
+        return [get_ai_analysis(text) for text in texts]
+    try:
+        with _model_lock:
+            sentiment_results = sentiment_model(texts, batch_size=AI_BATCH_SIZE)
+            emotion_results = emotion_model(texts, batch_size=AI_BATCH_SIZE)
+    except Exception as e:
+        logger.warning(f"Batched AI analysis failed, analyzing one at a time: {e}")
+        return [get_ai_analysis(text) for text in texts]
+    # A single-text call returns [result]; wrap each batch item the same way
+    return [
+        {'sentiment': [sentiment_result], 'emotions': [emotion_result], 'available': True}
+        for sentiment_result, emotion_result in zip(sentiment_results, emotion_results)
+    ]
+
 async def ultra_advanced_analyze_mood(text: str) -> Dict[str, Any]:
     """ULTRA-ADVANCED mood analysis achieving 95%+ accuracy with AI integration"""
+    cached = get_cached_mood(text)
+    if cached is not None:
+        return cached
+    return cache_mood(text, await asyncio.get_running_loop().run_in_executor(analysis_executor, analyze_mood_sync, text))
+
+def analyze_mood_sync(text: str) -> Dict[str, Any]:
+    """Uncached, blocking analysis of one text (runs on analysis_executor)"""
     start_time = time.time()
+    return build_mood_analysis(text, get_ai_analysis(text), start_time)
+
+def analyze_moods_sync(texts: List[str], return_exceptions: bool = False) -> List[Any]:
+    """Uncached, blocking analysis of many texts with shared model calls (runs on analysis_executor).
     
+    With return_exceptions, a text whose analysis raises gets the exception in its slot instead of
+    aborting the rest, as with asyncio.gather.
+    """
+    start_time = time.time()
+    analyses = []
+    for text, ai_analysis in zip(texts, get_ai_analyses(texts)):
+        try:
+            analyses.append(build_mood_analysis(text, ai_analysis, start_time))
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            analyses.append(e)
+    return analyses
+
+async def ultra_advanced_analyze_mood_batch(texts: List[str], return_exceptions: bool = False) -> List[Any]:
+    """ultra_advanced_analyze_mood for many texts, sharing the AI model forward passes; results are in input order.
+    
+    With return_exceptions, failed texts get their exception in place of a result (and are not cached).
+    """
+    results = [get_cached_mood(text) for text in texts]
+    # Only cache misses (each distinct text once) go through the models; the cache is only touched on the loop
+    misses = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+    analyses = await asyncio.get_running_loop().run_in_executor(
+        analysis_executor, partial(analyze_moods_sync, misses, return_exceptions=return_exceptions)
+    )
+    analyzed = {
+        text: analysis if isinstance(analysis, Exception) else cache_mood(text, analysis)
+        for text, analysis in zip(misses, analyses)
+    }
+    return [
+        result if result is not None
+        else analyzed[text] if isinstance(analyzed[text], Exception)
+        else dict(analyzed[text])
+        for text, result in zip(texts, results)
+    ]
+
+def build_mood_analysis(text: str, ai_analysis: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+    """Pattern, context and sentiment analysis of text, fused with its AI model outputs"""
     # Phase 1: Revolutionary text preprocessing
     processed_info = revolutionary_preprocess_text(text)
     
-    # Phase 2: AI-enhanced analysis (if available)
-    ai_analysis = None
-    if ML_AVAILABLE and sentiment_model and emotion_model:
-        try:
-            # Get AI sentiment analysis
-            ai_sentiment_result = sentiment_model(text)
-            
-            # Get AI emotion analysis
-            ai_emotion_result = emotion_model(text)
-            
-            ai_analysis = {
-                'sentiment': ai_sentiment_result,
-                'emotions': ai_emotion_result,
-                'available': True
-            }
-        except Exception as e:
-            logger.warning(f"AI analysis failed: {e}")
-            ai_analysis = {'available': False, 'error': str(e)}
-    else:
-        ai_analysis = {'available': False, 'reason': 'AI models not loaded'}
+    # Phase 2: AI-enhanced analysis (if available) - ai_analysis, computed by the caller
     
     # Phase 3: Advanced pattern-based analysis
     emotion_scores = revolutionary_pattern_matching(text, processed_info)
@@ -1717,6 +1826,7 @@ async def initialize_ultra_advanced_models():
     global analysis_cache, ai_cache
     analysis_cache.clear()
     ai_cache.clear()
+    _MOOD_CACHE.clear()  # Entries computed before the models loaded lack the AI fusion
     
     models_loaded = True
     
@@ -1737,6 +1847,16 @@ async def initialize_ultra_advanced_models():
     logger.info(f"🔧 Capabilities: {', '.join(capabilities)}")
     logger.info("📈 Target Accuracy: 95%+")
 
+# Small batch run once at startup so lazy init and kernel selection don't land on the first request
+WARMUP_TEXTS = ["I feel great today!", "Everything is going wrong", "meh"]
+
+async def warm_up_models():
+    """Load the models, then push WARMUP_TEXTS through the full analysis (bypassing the result cache)"""
+    await initialize_ultra_advanced_models()
+    start_time = time.time()
+    await asyncio.get_running_loop().run_in_executor(analysis_executor, analyze_moods_sync, WARMUP_TEXTS)
+    logger.info(f"🔥 Warm-up analysis done in {time.time() - start_time:.2f}s")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager with advanced initialization"""
@@ -2,9 +2,8 @@ import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import MinMaxScaler
-from transformers import pipeline
-import spacy
 import json
+import re
 import sys
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -14,8 +13,28 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Load spaCy English model
-nlp = spacy.load("en_core_web_sm")
+# spaCy and the sentiment pipeline are only needed when the ultra-advanced
+# service is unavailable, so they are loaded lazily on first use
+_nlp = None
+_sentiment_model = None
+
+def _get_nlp():
+    """Load the spaCy English model on first use"""
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load("en_core_web_sm")
+    return _nlp
+
+def _get_sentiment_model():
+    """Load the RoBERTa sentiment pipeline on first use"""
+    global _sentiment_model
+    if _sentiment_model is None:
+        from transformers import pipeline
+        _sentiment_model = pipeline("sentiment-analysis",  # type: ignore
+                                    model="cardiffnlp/twitter-roberta-base-sentiment-latest",
+                                    return_all_scores=True) # type: ignore
+    return _sentiment_model
 
 # ADVANCED emotion to audio feature mapping with precise calibrated ranges
 EMOTION_AUDIO_MAPPING = {
@@ -68,10 +87,8 @@ k = 7
 kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
 df['cluster'] = kmeans.fit_predict(df_scaled_df)
 
-# 4. Enhanced sentiment analysis using improved AI models
-sentiment_model = pipeline("sentiment-analysis",  # type: ignore
-                           model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-                           return_all_scores=True) # type: ignore
+# 3. Per-song user preference boost, reset and refilled on every request
+_boost = np.ones(len(df), dtype=np.float32)
 
 # 4. Map sentiment to cluster index
 def sentiment_to_cluster_index(sentiment_score, n_clusters):
@@ -81,9 +98,10 @@ def sentiment_to_cluster_index(sentiment_score, n_clusters):
 # 5. Enhanced sentence-level sentiment scoring using AI models
 def get_sentiment(text):
     """Advanced sentiment analysis using improved AI models"""
-    doc = nlp(text)
+    doc = _get_nlp()(text)
     sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
 
+    sentiment_model = _get_sentiment_model()
     scores = []
     for sentence in sentences:
         try:
@@ -155,40 +173,33 @@ def recommend_songs_by_emotion(df, primary_emotion, sentiment_score, kmeans_mode
     # Generate progressive valence targets
     valence_targets = np.linspace(start_valence, end_valence, num_songs)
     
-    # Calculate similarity scores for each song with progressive targeting
-    df_copy = df.copy()
-    selected_songs = []
-    used_tracks = set()
+    # Score every song against all valence targets at once: one row per
+    # playlist position, one column per song
+    emotion_similarity = (1 - np.abs(df['valence'].to_numpy()[None, :] - valence_targets[:, None])) * 0.4  # Progressive valence
+    emotion_similarity += (1 - np.abs(df['energy'].to_numpy() - target_energy)) * 0.25
+    emotion_similarity += (1 - np.abs(df['danceability'].to_numpy() - target_danceability)) * 0.2
+    emotion_similarity += (1 - np.abs((df['tempo'].to_numpy() - target_tempo) / 100)) * 0.1
+    emotion_similarity += (1 - np.abs(df['acousticness'].to_numpy() - target_acousticness)) * 0.05
     
-    for i, target_valence in enumerate(valence_targets):
-        # Filter out already selected songs
-        available_songs = df_copy[~df_copy['track_name'].isin(used_tracks)].copy()
-        
-        if available_songs.empty:
+    # Apply user preference boost
+    final_scores = np.nan_to_num(emotion_similarity * _boost[None, :], nan=-np.inf)
+    
+    # Greedily pick the best song for each position, never repeating a track name
+    track_codes = pd.factorize(df['track_name'])[0]
+    available = np.ones(len(df), dtype=bool)
+    selected_rows = []
+    selected_scores = []
+    
+    for position_scores in final_scores:
+        if not available.any():
             break
         
-        # Calculate emotion similarity with progressive valence targeting
-        available_songs['emotion_similarity'] = (
-            (1 - abs(available_songs['valence'] - target_valence)) * 0.4 +  # Progressive valence
-            (1 - abs(available_songs['energy'] - target_energy)) * 0.25 +
-            (1 - abs(available_songs['danceability'] - target_danceability)) * 0.2 +
-            (1 - abs((available_songs['tempo'] - target_tempo) / 100)) * 0.1 +
-            (1 - abs(available_songs['acousticness'] - target_acousticness)) * 0.05
-        )
-        
-        # Apply user preference boost if available
-        if 'user_preference_boost' in available_songs.columns:
-            available_songs['final_score'] = available_songs['emotion_similarity'] * available_songs['user_preference_boost']
-        else:
-            available_songs['final_score'] = available_songs['emotion_similarity']
-        
-        # Select best song for this position
-        best_song = available_songs.nlargest(1, 'final_score').iloc[0]
-        selected_songs.append(best_song)
-        used_tracks.add(best_song['track_name'])
+        best_row = int(np.argmax(np.where(available, position_scores, -np.inf)))
+        selected_rows.append(best_row)
+        selected_scores.append(position_scores[best_row])
+        available &= track_codes != track_codes[best_row]
     
-    # Convert to DataFrame
-    recommendations = pd.DataFrame(selected_songs)
+    recommendations = df.iloc[selected_rows].assign(final_score=selected_scores)
     
     return recommendations[['track_name', 'artist_name', 'valence', 'energy', 'danceability', 'tempo', 'acousticness', 'final_score']]
 
@@ -253,10 +264,10 @@ def recommend_songs(df, sentiment_score, kmeans_model, num_songs=10):
         selected = cluster_df.sort_values('recommendation_score', ascending=False).head(num_songs)
         
     # Enhanced algorithm using user preferences
-    if 'user_preference_boost' in df.columns:
+    if (_boost != 1.0).any():
         # Apply user preference boost to recommendation scoring
         cluster_df['recommendation_score'] = (
-            cluster_df.get('user_preference_boost', 1.0) * 0.4 +  # 40% user preference boost
+            _boost[cluster_df.index.to_numpy()] * 0.4 +  # 40% user preference boost
             cluster_df['popularity'] / 100 * 0.3 +  # 30% popularity
             (1 - abs(cluster_df['valence'] - (start_valence + end_valence) / 2)) * 0.3  # 30% mood match
         )
@@ -320,6 +331,9 @@ def enhance_with_user_data(user_id=None):
     """Enhance the dataset with user's top tracks for better personalization"""
     global df
     
+    # Clear any boost left over from a previous request
+    _boost[:] = 1.0
+    
     if not user_id:
         return df
     
@@ -342,15 +356,16 @@ def enhance_with_user_data(user_id=None):
             if user_tracks:
                 print(f"DEBUG: Found {len(user_tracks)} user preference tracks", file=sys.stderr)
                 
-                # Mark similar tracks in the dataset for boosting
-                for track in user_tracks:
-                    track_name, artist_name, popularity = track
-                    # Find similar tracks in the dataset
-                    similar_mask = (
-                        (df['track_name'].str.contains(track_name, case=False, na=False)) |
-                        (df['artist_name'].str.contains(artist_name, case=False, na=False))
-                    )
-                    df.loc[similar_mask, 'user_preference_boost'] = 1.2
+                # Mark similar tracks in the dataset for boosting, matching
+                # all of the user's tracks and artists in a single pass
+                track_pattern = '|'.join(re.escape(track[0]) for track in user_tracks if track[0])
+                artist_pattern = '|'.join(re.escape(track[1]) for track in user_tracks if track[1])
+                similar_mask = np.zeros(len(df), dtype=bool)
+                if track_pattern:
+                    similar_mask |= df['track_name'].str.contains(track_pattern, case=False, na=False).to_numpy()
+                if artist_pattern:
+                    similar_mask |= df['artist_name'].str.contains(artist_pattern, case=False, na=False).to_numpy()
+                _boost[similar_mask] = 1.2
                     
                 print(f"DEBUG: Applied preference boost to similar tracks", file=sys.stderr)
             else:
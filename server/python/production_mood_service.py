@@ -19,7 +19,7 @@ from pydantic import BaseModel
 from improved_mood_ai import (
     ultra_advanced_analyze_mood, 
     UltraAdvancedMoodResponse,
-    initialize_ultra_advanced_models
+    warm_up_models
 )
 
 # Setup logging
@@ -47,9 +47,9 @@ class LegacyMoodResponse(BaseModel):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize models on startup"""
+    """Initialize and warm up models on startup, before the first request is accepted"""
     logger.info("🚀 Starting Production Ultra-Advanced Mood Detection Service")
-    await initialize_ultra_advanced_models()
+    await warm_up_models()
     logger.info("✅ Models initialized successfully")
     yield
     logger.info("🔄 Shutting down service")
@@ -0,0 +1,45 @@
+"""
+Similarity kernels for the mood service recommender
+Uses Numba-compiled loops when available, NumPy otherwise
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=True, cache=True)
+    def weighted_similarity(block, target, weights, out, scratch):
+        """out[i] = sum_j weights[j] * (1 - |block[i, j] - target[j]|), streaming over a contiguous block.
+        
+        scratch is unused here - this kernel needs no intermediates; it is accepted only so callers
+        can pass the NumPy fallback's buffer through one signature.
+        """
+        n_features = block.shape[1]
+        for i in range(block.shape[0]):
+            score = 0.0
+            for j in range(n_features):
+                score += weights[j] * (1.0 - abs(block[i, j] - target[j]))
+            out[i] = score
+        return out
+else:
+    def weighted_similarity(block, target, weights, out, scratch):
+        """out[i] = sum_j weights[j] * (1 - |block[i, j] - target[j]|), using scratch (block-shaped) for the intermediates"""
+        song_features = np.subtract(block, target, out=scratch)
+        np.abs(song_features, out=song_features)
+        np.subtract(1.0, song_features, out=song_features)
+        return np.matmul(song_features, weights, out=out)
+
+
+def warm_up(n_features: int):
+    """Trigger JIT compilation (or load the on-disk cache) outside the request path"""
+    block = np.zeros((1, n_features), dtype=np.float32)
+    weights = np.zeros(n_features, dtype=np.float32)
+    weighted_similarity(
+        block, weights, weights,
+        np.empty(1, dtype=np.float32), np.empty((1, n_features), dtype=np.float32)
+    )
@@ -1,63 +1,194 @@
 import json
+import os
 import sys
+import threading
 import numpy as np
 import re
 from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from functools import lru_cache, wraps
+from types import MappingProxyType
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
+try:
+    import re2  # google-re2: linear-time DFA matching
+except ImportError:
+    re2 = None
+
+# Sentences of one text go through the model together, truncated to keep padding bounded
+SENTENCE_BATCH_SIZE = 32
+MAX_TOKENS = 128
 
-# Initialize models as None
-nlp = None
-sentiment_model = None
+# Repeated texts (identical journal entries, short replies) are answered from memory
+TEXT_CACHE_SIZE = 4096
+
+def memoize_text(func):
+    """lru_cache keyed on the text (and any extra args); non-string inputs bypass the cache and go straight to func"""
+    cached = lru_cache(maxsize=TEXT_CACHE_SIZE)(func)
+    
+    @wraps(func)
+    def wrapper(text, *args):
+        return cached(text, *args) if isinstance(text, str) else func(text, *args)
+    
+    wrapper.cache_clear = cached.cache_clear
+    wrapper.cache_info = cached.cache_info
+    return wrapper
 
 # -------------------------
-# Load spaCy English model safely
+# Models are loaded on first use (keyword-only callers never import spaCy/transformers);
+# PRELOAD_MODELS starts that load in a background thread at import so it overlaps other work
 # -------------------------
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    print("Loaded spaCy model")
-except OSError:
+PRELOAD_MODELS = os.getenv("SENTIMENT_PRELOAD", "1") == "1"
+
+_nlp = None
+_sentiment_model = None
+_models_loaded = False
+_models_lock = threading.Lock()
+
+def load_nlp():
+    """spaCy sentence splitter (only doc.sents is used, so no tagger/parser/NER model)"""
     try:
-        import subprocess
-        subprocess.run([sys.executable, "-m", "spacy", "download", "en_core_web_sm"])
-        nlp = spacy.load("en_core_web_sm")
-        print("Downloaded and loaded spaCy model")
+        import spacy
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        print("Loaded spaCy sentencizer")
+        return nlp
     except Exception as e:
-        nlp = None
-        print(f"spaCy model not available: {e}")
-except Exception as e:
-    nlp = None
-    print(f"spaCy import failed: {e}")
+        print(f"spaCy sentencizer not available: {e}")
+        return None
+
+def select_device():
+    """First GPU with half-precision weights when available, CPU fp32 otherwise"""
+    try:
+        import torch
+    except ImportError:
+        return -1, None
+    if torch.cuda.is_available():
+        return 0, torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    return -1, None  # Library default (float32)
+
+# CPU PyTorch models swap their Linear layers for dynamic INT8 ones (VNNI/NEON int8 kernels, ~4x smaller weights)
+QUANTIZE_INT8 = os.getenv("SENTIMENT_QUANTIZE", "1") == "1"
+
+def quantize_pipeline(pipe, device):
+    """Dynamic INT8 quantization of the pipeline's Linear layers on CPU, keeping float on failure"""
+    if not QUANTIZE_INT8 or device != -1:
+        return pipe
+    try:
+        import platform
+        import torch
+        machine = platform.machine().lower()
+        torch.backends.quantized.engine = 'qnnpack' if machine.startswith(('arm', 'aarch')) else 'fbgemm'
+        pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        print(f"Quantized {pipe.model.__class__.__name__} to int8 ({torch.backends.quantized.engine})")
+    except Exception as e:
+        print(f"INT8 quantization unavailable, keeping float32: {e}")
+    return pipe
 
 # -------------------------
-# Load Sentiment Model with fallback
+# ONNX Runtime (CPU only): graph-fused inference, exported once and reused from disk
 # -------------------------
-try:
-    from transformers import pipeline
-    sentiment_model = pipeline(
-        "sentiment-analysis", # type: ignore
-        model="cardiffnlp/twitter-roberta-base-sentiment",
-        tokenizer="cardiffnlp/twitter-roberta-base-sentiment",
-        return_all_scores=True
-    ) # type: ignore
-    print("Loaded advanced RoBERTa sentiment model")
-except Exception as e:
-    print(f"Error loading RoBERTa model: {e}")
+ONNX_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models")
+USE_ONNX = os.getenv("SENTIMENT_USE_ONNX", "1") == "1"
+
+def load_onnx_sentiment_pipeline(model_name, device, **kwargs):
+    """Sentiment pipeline on ONNX Runtime, or None to use PyTorch (optimum missing, GPU in use, or export failed)"""
+    if not USE_ONNX or device != -1:
+        return None
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from optimum.pipelines import pipeline as ort_pipeline
+    except ImportError:
+        return None
+    
+    try:
+        export_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace('/', '--'))
+        if not os.path.isdir(export_dir):
+            print(f"Exporting {model_name} to ONNX (first run only)...")
+            ORTModelForSequenceClassification.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+        ort_model = ORTModelForSequenceClassification.from_pretrained(export_dir, provider="CPUExecutionProvider")
+        return ort_pipeline(
+            "sentiment-analysis", model=ort_model, tokenizer=model_name, accelerator="ort", **kwargs
+        )
+    except Exception as e:
+        print(f"ONNX Runtime unavailable for {model_name}, using PyTorch: {e}")
+        return None
+
+def load_sentiment_model():
+    """RoBERTa sentiment pipeline, DistilBERT if that fails, None if transformers is unavailable"""
+    device, dtype = select_device()
+    try:
+        from transformers import pipeline
+        sentiment_model = load_onnx_sentiment_pipeline(
+            "cardiffnlp/twitter-roberta-base-sentiment",
+            device,
+            return_all_scores=True,
+            batch_size=SENTENCE_BATCH_SIZE
+        )
+        if sentiment_model is not None:
+            print("Loaded advanced RoBERTa sentiment model with ONNX Runtime")
+        else:
+            sentiment_model = pipeline(
+                "sentiment-analysis", # type: ignore
+                model="cardiffnlp/twitter-roberta-base-sentiment",
+                tokenizer="cardiffnlp/twitter-roberta-base-sentiment",
+                return_all_scores=True,
+                batch_size=SENTENCE_BATCH_SIZE,
+                device=device,
+                torch_dtype=dtype
+            ) # type: ignore
+            sentiment_model = quantize_pipeline(sentiment_model, device)
+            print(f"Loaded advanced RoBERTa sentiment model on {'cuda:0' if device == 0 else 'cpu'}")
+        return sentiment_model
+    except Exception as e:
+        print(f"Error loading RoBERTa model: {e}")
     try:
         from transformers import pipeline
         sentiment_model = pipeline(
             "sentiment-analysis", # type: ignore
             model="distilbert/distilbert-base-uncased-finetuned-sst-2-english",
-            return_all_scores=True
+            return_all_scores=True,
+            batch_size=SENTENCE_BATCH_SIZE,
+            device=device,
+            torch_dtype=dtype
         ) # type: ignore
+        sentiment_model = quantize_pipeline(sentiment_model, device)
         print("⚠️ Using fallback DistilBERT model")
+        return sentiment_model
     except Exception as e:
         print(f"⚠️ Transformers not available, using keyword-based analysis: {e}")
-        sentiment_model = None
+        return None
+
+def ensure_models_loaded():
+    """Load both models once; concurrent callers (including the preload thread) wait for the first load"""
+    global _nlp, _sentiment_model, _models_loaded
+    if _models_loaded:
+        return
+    with _models_lock:
+        if not _models_loaded:
+            _nlp = load_nlp()
+            _sentiment_model = load_sentiment_model()
+            _models_loaded = True
+
+def get_nlp():
+    """spaCy sentence splitter, or None (loads on first call)"""
+    ensure_models_loaded()
+    return _nlp
+
+def get_sentiment_model():
+    """Sentiment pipeline, or None for keyword-only analysis (loads on first call)"""
+    ensure_models_loaded()
+    return _sentiment_model
+
+if PRELOAD_MODELS:
+    threading.Thread(target=ensure_models_loaded, name="sentiment-model-preload", daemon=True).start()
 
 # -------------------------
-# Emotion & Emoji Mappings
+# Emotion & Emoji Mappings (read-only: the locators and score arrays below are derived from them at import)
 # -------------------------
-CRITICAL_EMOTION_INDICATORS = {
+CRITICAL_EMOTION_INDICATORS = MappingProxyType({
     'extreme_positive': ['ecstatic', 'overjoyed', 'euphoric', 'blissful', 'thrilled', 'amazing', 'fantastic', 'incredible', 'wonderful', 'awesome', 'elated', 'top of the world', 'on cloud nine', 'over the moon', 'walking on air', 'beyond happy', 'absolutely thrilled'],
     'positive': ['great', 'good', 'happy', 'excellent', 'love', 'enjoy', 'pleased', 'excited', 'glad', 'satisfied', 'content', 'grateful', 'hopeful', 'calm', 'peaceful', 'proud', 'feel amazing', 'feel loved', 'appreciated', 'making progress', 'good news'],
     'mixed_positive': ['bittersweet', 'mixed bag', 'tired but proud', 'nervous but ready', 'stressed but happy', 'down but hopeful', 'scared but hopeful', 'happy tears', 'grateful for small wins', 'anxious but excited', 'nervous but ready'],
@@ -65,9 +196,9 @@ CRITICAL_EMOTION_INDICATORS = {
     'mixed_negative': ['overwhelmed', 'confused', 'conflicted', 'uncertain', 'anxious about', 'nervous', 'worried', 'this sucks but i\'ll deal', 'not great but managing'],
     'negative': ['bad', 'sad', 'upset', 'angry', 'frustrated', 'disappointed', 'worried', 'stressed', 'anxious', 'hate', 'bored', 'unfair', 'sucks', 'going wrong', 'feeling down', 'life feels empty', 'want to cry', 'feeling blue'],
     'extreme_negative': ['devastated', 'heartbroken', 'suicidal', 'hopeless', 'despairing', 'terrible', 'awful', 'horrible', 'miserable', 'trapped', 'helpless', 'empty', "can't take this", "can't take anymore", 'everything is going wrong', 'completely overwhelmed', 'feeling trapped']
-}
+})
 
-EMOJI_SENTIMENT = {
+EMOJI_SENTIMENT = MappingProxyType({
     '😄': 0.9, '😊': 0.8, '🙂': 0.6, '😁': 0.85, '😃': 0.8, '😀': 0.75,
     '😔': -0.8, '😢': -0.7, '😭': -0.95, '😞': -0.6, '😟': -0.5,
     '😤': -0.7, '😠': -0.8, '😡': -0.9, '🤬': -0.95,
@@ -75,94 +206,146 @@ EMOJI_SENTIMENT = {
     '🤷': -0.1, '🤷‍♂️': -0.1, '🤷‍♀️': -0.1, '😐': 0.0, '😑': -0.1,
     '😌': 0.7, '😇': 0.8, '🥰': 0.9, '😍': 0.85, '🤗': 0.75,
     '😴': -0.2, '😪': -0.4, '🥱': -0.3, '😵': -0.6
-}
+})
 
 SARCASM_PATTERNS = [
     r'just my luck', r'of course', r'great, just great', r'wonderful, just wonderful',
     r'exactly what I needed', r'perfect timing', r"that's helpful", r'thanks for nothing'
 ]
+# One alternation, scanned by RE2's DFA when available (the patterns are RE2-compatible)
+_RE_SARCASM = (re2 or re).compile('|'.join(SARCASM_PATTERNS))
+
+# Every emoji in one regex pass, longest first so ZWJ sequences match whole. str.count also credited
+# the emoji inside a sequence (🤷‍♂️ counts as 🤷 too), so each matched token maps to all emoji it contains
+_RE_EMOJI = re.compile('|'.join(re.escape(emoji) for emoji in sorted(EMOJI_SENTIMENT, key=len, reverse=True)))
+_EMOJI_SCORES = np.array(list(EMOJI_SENTIMENT.values()))  # Indexed by emoji id (table order)
+_EMOJI_CONTAINED_IDS = {
+    token: [i for i, emoji in enumerate(EMOJI_SENTIMENT) for _ in range(token.count(emoji))]
+    for token in EMOJI_SENTIMENT
+}
 
-INTENSITY_MODIFIERS = {
+INTENSITY_MODIFIERS = MappingProxyType({
     'extremely': 1.4, 'incredibly': 1.4, 'absolutely': 1.3, 'completely': 1.3,
     'totally': 1.3, 'really': 1.2, 'very': 1.2, 'quite': 1.1, 'pretty': 1.1,
     'so': 1.2, 'super': 1.3, 'ultra': 1.4, 'mega': 1.4,
     'a bit': 0.7, 'somewhat': 0.8, 'kind of': 0.8, 'sort of': 0.8,
     'not too': 0.6, 'not very': 0.4, 'barely': 0.3, 'hardly': 0.3
-}
+})
+
+# -------------------------
+# Keyword-fallback lexicon, matched with a single longest-match regex pass
+# -------------------------
+# Enhanced keyword scoring with comprehensive patterns
+FALLBACK_POSITIVE_WORDS = MappingProxyType({
+    # Extreme positive (0.7-0.9)
+    'amazing': 0.85, 'awesome': 0.8, 'fantastic': 0.85, 'incredible': 0.85, 'wonderful': 0.8,
+    'ecstatic': 0.9, 'overjoyed': 0.9, 'thrilled': 0.85, 'elated': 0.8, 'blissful': 0.9,
+    'over the moon': 0.9, 'on top of the world': 0.95, 'on cloud nine': 0.9,
+    
+    # Strong positive (0.5-0.7)
+    'excellent': 0.7, 'great': 0.65, 'brilliant': 0.7, 'outstanding': 0.75, 'superb': 0.75,
+    'love': 0.75, 'adore': 0.75, 'excited': 0.7, 'perfect': 0.7, 'best': 0.7,
+    'feel amazing': 0.85, 'feel loved': 0.75, 'blessed': 0.7, 'fortunate': 0.65,
+    
+    # Moderate positive (0.3-0.5)
+    'good': 0.45, 'happy': 0.5, 'pleased': 0.4, 'satisfied': 0.4, 'enjoy': 0.5,
+    'glad': 0.45, 'grateful': 0.5, 'hopeful': 0.5, 'optimistic': 0.5, 'confident': 0.5,
+    'proud': 0.5, 'content': 0.4, 'appreciated': 0.5, 'good news': 0.6,
+    
+    # Mild positive (0.1-0.3)
+    'nice': 0.3, 'like': 0.25, 'calm': 0.35, 'peaceful': 0.4, 'making progress': 0.25,
+    'finally': 0.3, 'lucky': 0.3
+})
+
+FALLBACK_NEGATIVE_WORDS = MappingProxyType({
+    # Extreme negative (-0.7 to -0.9)
+    'terrible': -0.85, 'awful': -0.85, 'horrible': -0.85, 'disgusting': -0.85,
+    'devastating': -0.9, 'heartbroken': -0.9, 'devastated': -0.9, 'miserable': -0.85,
+    'hopeless': -0.85, 'helpless': -0.8, 'trapped': -0.8, 'suicidal': -0.95,
+    'can\'t take this': -0.9, 'can\'t take anymore': -0.9, 'everything going wrong': -0.85,
+    
+    # Strong negative (-0.5 to -0.7)
+    'hate': -0.8, 'furious': -0.8, 'angry': -0.7, 'frustrated': -0.6, 'depressed': -0.75,
+    'overwhelmed': -0.7, 'stressed': -0.6, 'anxious': -0.6, 'worried': -0.5,
+    'disappointed': -0.6, 'empty': -0.7, 'life feels empty': -0.8, 'want to cry': -0.8,
+    
+    # Moderate negative (-0.3 to -0.5)
+    'bad': -0.5, 'sad': -0.6, 'upset': -0.6, 'annoyed': -0.5, 'unfair': -0.6,
+    'sucks': -0.6, 'going wrong': -0.7, 'feeling down': -0.6, 'feeling blue': -0.6,
+    'bored': -0.4, 'exhausted': -0.5, 'drained': -0.5,
+    
+    # Mild negative (-0.1 to -0.3)
+    'poor': -0.4, 'wrong': -0.4, 'tired': -0.3, 'scared': -0.6, 'afraid': -0.6,
+    'nervous': -0.4, 'confused': -0.3, 'lost': -0.5
+})
+
+# Flat score array; a keyword's id is its index, so scoring is one gather and sum
+FALLBACK_KEYWORDS = [*FALLBACK_POSITIVE_WORDS.items(), *FALLBACK_NEGATIVE_WORDS.items()]
+_FALLBACK_IDS = {word: i for i, (word, _) in enumerate(FALLBACK_KEYWORDS)}
+_FALLBACK_SCORES = np.array([value for _, value in FALLBACK_KEYWORDS])
+
+FALLBACK_MODIFIER_TIERS = [
+    (('extremely', 'incredibly', 'absolutely', 'completely', 'totally'), 1.4),  # Strong amplification for extreme modifiers
+    (('very', 'really', 'so', 'super'), 1.25),  # Good amplification for strong modifiers
+    (('quite', 'pretty', 'somewhat'), 1.1),  # Mild amplification
+    (('a bit', 'kind of', 'sort of'), 0.85)  # Slight reduction
+]
+
+def ordered_sum(values):
+    """Left-to-right sum of a score array; np.sum's pairwise order can differ in the last bit and flip near-zero signs"""
+    return float(np.add.accumulate(values)[-1])
+
+def make_phrase_locator(phrases):
+    """Build a function mapping each phrase found as a substring of a (lowercased) text to its first position"""
+    phrases = frozenset(phrases)
+    if ahocorasick is None:
+        return lambda text: {phrase: text.find(phrase) for phrase in phrases if phrase in text}
+    automaton = ahocorasick.Automaton()
+    for phrase in phrases:
+        automaton.add_word(phrase, phrase)
+    automaton.make_automaton()
+    
+    def locate(text):
+        # Matches arrive ordered by end position, so the first one seen for a phrase is its first occurrence
+        positions = {}
+        for end, phrase in automaton.iter(text):
+            if phrase not in positions:
+                positions[phrase] = end - len(phrase) + 1
+        return positions
+    
+    return locate
+
+# Keywords are matched leftmost-longest without overlap (alternatives tried longest first), so a phrase
+# like 'feel amazing' or 'going wrong' is not also credited as 'amazing' or 'wrong'
+_RE_FALLBACK_KEYWORDS = (re2 or re).compile(
+    '|'.join(re.escape(word) for word in sorted(_FALLBACK_IDS, key=len, reverse=True))
+)
+locate_fallback_modifiers = make_phrase_locator(mod for modifiers, _ in FALLBACK_MODIFIER_TIERS for mod in modifiers)
 
 # -------------------------
 # Keyword-based fallback when transformers not available
 # -------------------------
-def get_keyword_sentiment_fallback(text):
-    """Fallback keyword-based sentiment analysis when transformers are unavailable"""
+@memoize_text
+def get_keyword_sentiment_fallback(text, text_lower=None):
+    """Fallback keyword-based sentiment analysis when transformers are unavailable; text_lower saves a re-lowercase"""
     if not text or not isinstance(text, str):
         return 0.0
     
-    text_lower = text.lower()
+    if text_lower is None:
+        text_lower = text.lower()
     score = 0
     
-    # Enhanced keyword scoring with comprehensive patterns
-    positive_words = {
-        # Extreme positive (0.7-0.9)
-        'amazing': 0.85, 'awesome': 0.8, 'fantastic': 0.85, 'incredible': 0.85, 'wonderful': 0.8,
-        'ecstatic': 0.9, 'overjoyed': 0.9, 'thrilled': 0.85, 'elated': 0.8, 'blissful': 0.9,
-        'over the moon': 0.9, 'on top of the world': 0.95, 'on cloud nine': 0.9,
-        
-        # Strong positive (0.5-0.7)
-        'excellent': 0.7, 'great': 0.65, 'brilliant': 0.7, 'outstanding': 0.75, 'superb': 0.75,
-        'love': 0.75, 'adore': 0.75, 'excited': 0.7, 'perfect': 0.7, 'best': 0.7,
-        'feel amazing': 0.85, 'feel loved': 0.75, 'blessed': 0.7, 'fortunate': 0.65,
-        
-        # Moderate positive (0.3-0.5)
-        'good': 0.45, 'happy': 0.5, 'pleased': 0.4, 'satisfied': 0.4, 'enjoy': 0.5,
-        'glad': 0.45, 'grateful': 0.5, 'hopeful': 0.5, 'optimistic': 0.5, 'confident': 0.5,
-        'proud': 0.5, 'content': 0.4, 'appreciated': 0.5, 'good news': 0.6,
-        
-        # Mild positive (0.1-0.3)
-        'nice': 0.3, 'like': 0.25, 'calm': 0.35, 'peaceful': 0.4, 'making progress': 0.25,
-        'finally': 0.3, 'lucky': 0.3
-    }
+    # Count matches (each keyword once) and apply scoring
+    ids = sorted({_FALLBACK_IDS[word] for word in _RE_FALLBACK_KEYWORDS.findall(text_lower)})
+    if ids:
+        score = ordered_sum(_FALLBACK_SCORES[ids])
     
-    negative_words = {
-        # Extreme negative (-0.7 to -0.9)
-        'terrible': -0.85, 'awful': -0.85, 'horrible': -0.85, 'disgusting': -0.85,
-        'devastating': -0.9, 'heartbroken': -0.9, 'devastated': -0.9, 'miserable': -0.85,
-        'hopeless': -0.85, 'helpless': -0.8, 'trapped': -0.8, 'suicidal': -0.95,
-        'can\'t take this': -0.9, 'can\'t take anymore': -0.9, 'everything going wrong': -0.85,
-        
-        # Strong negative (-0.5 to -0.7)
-        'hate': -0.8, 'furious': -0.8, 'angry': -0.7, 'frustrated': -0.6, 'depressed': -0.75,
-        'overwhelmed': -0.7, 'stressed': -0.6, 'anxious': -0.6, 'worried': -0.5,
-        'disappointed': -0.6, 'empty': -0.7, 'life feels empty': -0.8, 'want to cry': -0.8,
-        
-        # Moderate negative (-0.3 to -0.5)
-        'bad': -0.5, 'sad': -0.6, 'upset': -0.6, 'annoyed': -0.5, 'unfair': -0.6,
-        'sucks': -0.6, 'going wrong': -0.7, 'feeling down': -0.6, 'feeling blue': -0.6,
-        'bored': -0.4, 'exhausted': -0.5, 'drained': -0.5,
-        
-        # Mild negative (-0.1 to -0.3)
-        'poor': -0.4, 'wrong': -0.4, 'tired': -0.3, 'scared': -0.6, 'afraid': -0.6,
-        'nervous': -0.4, 'confused': -0.3, 'lost': -0.5
-    }
-    
-    # Count matches and apply scoring
-    for word, value in positive_words.items():
-        if word in text_lower:
-            score += value
-    
-    for word, value in negative_words.items():
-        if word in text_lower:
-            score += value
-    
-    # Apply intensity modifiers with proper scaling for extreme cases
-    if any(mod in text_lower for mod in ['extremely', 'incredibly', 'absolutely', 'completely', 'totally']):
-        score *= 1.4  # Strong amplification for extreme modifiers
-    elif any(mod in text_lower for mod in ['very', 'really', 'so', 'super']):
-        score *= 1.25  # Good amplification for strong modifiers
-    elif any(mod in text_lower for mod in ['quite', 'pretty', 'somewhat']):
-        score *= 1.1   # Mild amplification
-    elif any(mod in text_lower for mod in ['a bit', 'kind of', 'sort of']):
-        score *= 0.85  # Slight reduction
+    # Apply intensity modifiers with proper scaling for extreme cases (strongest tier wins)
+    found = locate_fallback_modifiers(text_lower)
+    for modifiers, multiplier in FALLBACK_MODIFIER_TIERS:
+        if any(mod in found for mod in modifiers):
+            score *= multiplier
+            break
     
     # Apply wider bounds to allow for extreme cases
     return max(-0.95, min(0.95, score))
@@ -170,70 +353,97 @@ def get_keyword_sentiment_fallback(text):
 # -------------------------
 # Preprocessing
 # -------------------------
+CONTRACTIONS = MappingProxyType({
+    "can't": "cannot", "won't": "will not", "n't": " not",
+    "'re": " are", "'ve": " have", "'ll": " will", "'d": " would",
+    "'m": " am", "'s": " is"
+})
+
+# Compiled once at import; expansions contain no apostrophes, so one alternation pass
+# gives the same result as substituting each contraction in turn
+_RE_MULTI_EXCLAIM = re.compile(r'[!]{2,}')
+_RE_MULTI_QUESTION = re.compile(r'[?]{2,}')
+_RE_ELLIPSIS = re.compile(r'\.{3,}')
+_RE_CONTRACTIONS = re.compile('|'.join(rf"\b{re.escape(contraction)}\b" for contraction in CONTRACTIONS))
+
+@memoize_text
 def preprocess_text(text):
     if not text or not isinstance(text, str):
         return ""
-    text = re.sub(r'[!]{2,}', ' very_excited ', text)
-    text = re.sub(r'[?]{2,}', ' confused ', text)
-    text = re.sub(r'\.{3,}', ' thoughtful ', text)
-    contractions = {
-        "can't": "cannot", "won't": "will not", "n't": " not",
-        "'re": " are", "'ve": " have", "'ll": " will", "'d": " would",
-        "'m": " am", "'s": " is"
-    }
-    for contraction, expansion in contractions.items():
-        text = re.sub(rf"\b{re.escape(contraction)}\b", expansion, text)
+    text = _RE_MULTI_EXCLAIM.sub(' very_excited ', text)
+    text = _RE_MULTI_QUESTION.sub(' confused ', text)
+    text = _RE_ELLIPSIS.sub(' thoughtful ', text)
+    text = _RE_CONTRACTIONS.sub(lambda m: CONTRACTIONS[m.group(0)], text)
     return text.strip()
 
 # -------------------------
 # Emotion Boost
 # -------------------------
-def get_critical_emotion_boost(text):
-    text_lower = text.lower()
+CRITICAL_EMOTION_WEIGHTS = MappingProxyType({
+    'extreme_positive': 0.6,  # Increased for extreme cases
+    'positive': 0.4,  # Increased for strong cases
+    'mixed_positive': 0.2,  # Moderate mixed
+    'neutral': 0.05,  # Minimal neutral
+    'mixed_negative': -0.2,  # Moderate mixed negative
+    'negative': -0.4,  # Strong negative
+    'extreme_negative': -0.6  # Extreme negative
+})
+
+# Flat (keyword, emotion) table in indicator order; a keyword listed under several emotions has several ids
+_CRITICAL_ENTRIES = [
+    (keyword, emotion_idx)
+    for emotion_idx, keywords in enumerate(CRITICAL_EMOTION_INDICATORS.values())
+    for keyword in keywords
+]
+_CRITICAL_IDS = defaultdict(list)
+for entry_id, (keyword, _) in enumerate(_CRITICAL_ENTRIES):
+    _CRITICAL_IDS[keyword].append(entry_id)
+_CRITICAL_EMOTION_IDX = np.array([emotion_idx for _, emotion_idx in _CRITICAL_ENTRIES])
+_CRITICAL_WEIGHTS = np.array([CRITICAL_EMOTION_WEIGHTS[emotion] for emotion in CRITICAL_EMOTION_INDICATORS])
+
+locate_critical_phrases = make_phrase_locator(list(_CRITICAL_IDS) + list(INTENSITY_MODIFIERS))
+
+@memoize_text
+def get_critical_emotion_boost(text, text_lower=None):
+    if text_lower is None:
+        text_lower = text.lower()
     emotion_scores = []
 
+    emoji_ids = [i for token in _RE_EMOJI.findall(text) for i in _EMOJI_CONTAINED_IDS[token]]
+    emoji_count = len(emoji_ids)
     emoji_score = 0
-    emoji_count = 0
-    for emoji, score in EMOJI_SENTIMENT.items():
-        count = text.count(emoji)
-        if count > 0:
-            emoji_score += score * count
-            emoji_count += count
+    if emoji_ids:
+        counts = np.bincount(emoji_ids)
+        present = counts.nonzero()[0]
+        emoji_score = ordered_sum(_EMOJI_SCORES[present] * counts[present])
     if emoji_count > 0:
         emoji_boost = emoji_score / emoji_count
         if emoji_count > 1:
             emoji_boost *= min(1.5, 1 + (emoji_count - 1) * 0.2)
         emotion_scores.append(emoji_boost)
 
-    sarcasm_detected = any(re.search(p, text_lower) for p in SARCASM_PATTERNS)
-
-    for emotion, keywords in CRITICAL_EMOTION_INDICATORS.items():
-        emotion_boost = 0
-        for keyword in keywords:
-            if keyword in text_lower:
-                intensity = 1.0
-                for modifier, multiplier in INTENSITY_MODIFIERS.items():
-                    if modifier in text_lower:
-                        keyword_pos = text_lower.find(keyword)
-                        modifier_pos = text_lower.find(modifier)
-                        if abs(keyword_pos - modifier_pos) < 10:
-                            intensity = max(intensity, multiplier)
-                if emotion == 'extreme_positive':
-                    emotion_boost += 0.6 * intensity  # Increased for extreme cases
-                elif emotion == 'positive':
-                    emotion_boost += 0.4 * intensity  # Increased for strong cases
-                elif emotion == 'mixed_positive':
-                    emotion_boost += 0.2 * intensity  # Moderate mixed
-                elif emotion == 'neutral':
-                    emotion_boost += 0.05 * intensity  # Minimal neutral
-                elif emotion == 'mixed_negative':
-                    emotion_boost -= 0.2 * intensity  # Moderate mixed negative
-                elif emotion == 'negative':
-                    emotion_boost -= 0.4 * intensity  # Strong negative
-                elif emotion == 'extreme_negative':
-                    emotion_boost -= 0.6 * intensity  # Extreme negative
-        if emotion_boost != 0:
-            emotion_scores.append(emotion_boost)
+    sarcasm_detected = _RE_SARCASM.search(text_lower) is not None
+
+    # One scan finds every keyword and modifier; modifiers are kept sorted by position for bisection
+    found = locate_critical_phrases(text_lower)
+    modifier_hits = sorted((pos, INTENSITY_MODIFIERS[phrase]) for phrase, pos in found.items() if phrase in INTENSITY_MODIFIERS)
+    modifier_positions = [pos for pos, _ in modifier_hits]
+
+    # Only the keywords present are visited, in indicator order so per-emotion sums add up as before
+    hit_ids = sorted(entry_id for phrase in found for entry_id in _CRITICAL_IDS.get(phrase, ()))
+    if hit_ids:
+        intensities = []
+        for entry_id in hit_ids:
+            keyword_pos = found[_CRITICAL_ENTRIES[entry_id][0]]
+            # Strongest modifier whose first occurrence is within 10 characters of the keyword's
+            lo = bisect_left(modifier_positions, keyword_pos - 9)
+            hi = bisect_right(modifier_positions, keyword_pos + 9)
+            intensities.append(max([1.0] + [multiplier for _, multiplier in modifier_hits[lo:hi]]))
+        emotion_idx = _CRITICAL_EMOTION_IDX[hit_ids]
+        emotion_boosts = np.bincount(
+            emotion_idx, weights=_CRITICAL_WEIGHTS[emotion_idx] * intensities, minlength=len(_CRITICAL_WEIGHTS)
+        )
+        emotion_scores.extend(emotion_boosts[emotion_boosts != 0].tolist())
 
     if emotion_scores:
         pos_scores = [s for s in emotion_scores if s > 0]
@@ -250,152 +460,294 @@ def get_critical_emotion_boost(text):
 
     return boost
 
+# -------------------------
+# Sentence Scoring
+# -------------------------
+def map_confidence(raw_score, positive):
+    """Gradual scaling of classifier confidence to sentiment intensity, mirrored for negative labels"""
+    if raw_score > 0.95:  # Very high confidence -> extreme
+        score = 0.85 + (raw_score - 0.95) * 2.0  # 0.85 to 0.95
+    elif raw_score > 0.9:   # High confidence -> strong
+        score = 0.7 + (raw_score - 0.9) * 3.0   # 0.7 to 0.85
+    elif raw_score > 0.8:   # Medium-high confidence -> moderate-strong
+        score = 0.5 + (raw_score - 0.8) * 2.0   # 0.5 to 0.7
+    elif raw_score > 0.65:  # Medium confidence -> moderate
+        score = 0.3 + (raw_score - 0.65) * 1.33 # 0.3 to 0.5
+    else:  # Lower confidence -> mild
+        score = raw_score * 0.46  # 0 to 0.3
+    return score if positive else -score
+
+def get_sentence_score(result):
+    """Map one sentence's pipeline output (shaped like a single-sentence call) to a sentiment score"""
+    if isinstance(result, list) and result:
+        if isinstance(result[0], list):
+            sentiment_scores = {item['label']: item['score'] for item in result[0]}
+            score = sentiment_scores.get('LABEL_2', 0) - sentiment_scores.get('LABEL_0', 0)
+        elif isinstance(result[0], dict):
+            label = result[0]['label'].upper()
+            raw_score = result[0]['score']
+            
+            # More nuanced intensity-based scoring system
+            if label in ['POSITIVE', 'LABEL_2']:
+                score = map_confidence(raw_score, True)
+            elif label in ['NEGATIVE', 'LABEL_0']:
+                score = map_confidence(raw_score, False)
+            else:
+                score = 0
+        else:
+            score = 0
+    else:
+        score = 0
+    return score
+
+# -------------------------
+# Pattern Overrides
+# -------------------------
+# Checked in order; the first rule whose phrase groups all match (one phrase from each group) wins.
+# Rules: (phrase groups, sentiment, keep_higher) - keep_higher only raises the score to the value
+FALLBACK_OVERRIDES = [
+    ([['bittersweet']], 0.0, False),  # Perfect emotional balance
+    ([["can't take this anymore", "can't take anymore"]], -0.9, False),  # Extreme distress
+    ([['on top of the world']], 0.95, False),  # Peak positive
+    ([['could be worse']], 0.1, False),  # Resigned optimism
+    ([['just my luck'], ['lol']], -0.4, False),  # Sarcastic negative
+    ([['feel amazing today']], 0.85, True),  # Ensure high positive
+    ([['so excited for'], ['weekend', 'vacation']], 0.95, True)  # Extreme anticipation
+]
+
+# Patterns that need careful tuning for moderate emotions when the model is used
+MODEL_OVERRIDES = [
+    ([['tired but'], ['proud']], 0.2, False),  # Mixed positive, slight lean
+    ([['stressful but'], ['enjoyed']], 0.05, False),  # Nearly balanced
+    ([['down but hopeful']], 0.0, False),  # Perfect balance
+    ([['hopeful'], ['scared']], 0.1, False),  # Slight positive lean (covers 'hopeful and scared')
+    ([['mixed bag']], 0.05, False),  # Slight positive for mixed
+    ([['bored out of my mind']], -0.4, False),  # Moderate negative, not extreme
+    ([['this sucks but'], ['deal', 'cope']], -0.3, False),  # Negative but coping
+    ([['completely overwhelmed']], -0.7, False),  # Strong but not extreme
+    ([['calm and peaceful']], 0.7, False),  # Strong positive but not extreme
+    ([['grateful for small wins']], 0.7, False),  # Positive gratitude
+    ([['guess things are okay']], 0.1, False),  # Mild positive with hesitation
+    ([['not too bad'], ['suppose']], 0.15, False),  # Mildly positive with reservation
+    ([['could be worse']], 0.1, False),  # Resigned optimism
+    # Fix the remaining edge cases
+    ([['bittersweet']], 0.0, False),  # Perfect balance - override AI bias
+    ([['curl up and cry']], -0.9, False),  # Strong sadness (covers 'want to curl up and cry')
+    ([["don't care anymore"]], -0.6, False),  # Apathy with negative undertones
+    ([['just my luck'], ['lol']], -0.4, False)  # Sarcastic negative - override AI positivity bias
+]
+
+locate_override_phrases = make_phrase_locator(
+    phrase
+    for rules in (FALLBACK_OVERRIDES, MODEL_OVERRIDES)
+    for groups, _, _ in rules
+    for group in groups
+    for phrase in group
+)
+
+def apply_overrides(rules, found, sentiment):
+    """Apply the first rule whose phrase groups all appear in found, or return sentiment unchanged"""
+    for groups, value, keep_higher in rules:
+        if all(any(phrase in found for phrase in group) for group in groups):
+            return max(sentiment, value) if keep_higher else value
+    return sentiment
+
 # -------------------------
 # Sentiment Analysis
 # -------------------------
-def get_sentiment(text):
-    if not text or not isinstance(text, str) or len(text.strip()) == 0:
-        return 0.0
-    processed_text = preprocess_text(text)
+def get_fallback_sentiment(text):
+    """Keyword-based sentiment used when no transformers model is available"""
+    # Lowercased once for every phrase lookup below
+    text_lower = text.lower()
+    base_sentiment = get_keyword_sentiment_fallback(text, text_lower)
+    critical_boost = get_critical_emotion_boost(text, text_lower)
+    final_sentiment = float(np.clip(base_sentiment + critical_boost, -1, 1))
+    
+    # Apply only essential pattern corrections for specific problematic cases
+    # Handle specific extreme cases that need override
+    if text_lower.strip() == 'meh':
+        final_sentiment = 0.0  # Neutral apathy
+    else:
+        final_sentiment = apply_overrides(FALLBACK_OVERRIDES, locate_override_phrases(text_lower), final_sentiment)
+    
+    return final_sentiment
 
-    # If transformers model is not available, use keyword-based fallback
-    if sentiment_model is None:
-        base_sentiment = get_keyword_sentiment_fallback(text)
-        critical_boost = get_critical_emotion_boost(text)
-        final_sentiment = float(np.clip(base_sentiment + critical_boost, -1, 1))
-        
-        # Apply only essential pattern corrections for specific problematic cases
-        text_lower = text.lower()
-        
-        # Handle specific extreme cases that need override
-        if text_lower.strip() == 'meh':
-            final_sentiment = 0.0  # Neutral apathy
-        elif 'bittersweet' in text_lower:
-            final_sentiment = 0.0  # Perfect emotional balance
-        elif "can't take this anymore" in text_lower or "can't take anymore" in text_lower:
-            final_sentiment = -0.9  # Extreme distress
-        elif 'on top of the world' in text_lower:
-            final_sentiment = 0.95  # Peak positive
-        elif 'could be worse' in text_lower:
-            final_sentiment = 0.1   # Resigned optimism
-        elif 'just my luck' in text_lower and 'lol' in text_lower:
-            final_sentiment = -0.4  # Sarcastic negative
-        elif 'feel amazing today' in text_lower:
-            final_sentiment = max(final_sentiment, 0.85)  # Ensure high positive
-        elif 'so excited for' in text_lower and ('weekend' in text_lower or 'vacation' in text_lower):
-            final_sentiment = max(final_sentiment, 0.95)  # Extreme anticipation
-        
-        return final_sentiment
-
-    # Use spaCy for sentence splitting if available, otherwise use the whole text
+def split_sentences(text):
+    """Preprocess text and split it with spaCy if available, otherwise keep it whole"""
+    processed_text = preprocess_text(text)
+    nlp = get_nlp()
     if nlp is not None:
         doc = nlp(processed_text)
-        sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()] or [processed_text]
-    else:
-        sentences = [processed_text]
-
-    scores = []
-    for sentence in sentences:
-        try:
-            result = sentiment_model(sentence)
-            if isinstance(result, list) and result:
-                if isinstance(result[0], list):
-                    sentiment_scores = {item['label']: item['score'] for item in result[0]}
-                    score = sentiment_scores.get('LABEL_2', 0) - sentiment_scores.get('LABEL_0', 0)
-                elif isinstance(result[0], dict):
-                    label = result[0]['label'].upper()
-                    raw_score = result[0]['score']
-                    
-                    # More nuanced intensity-based scoring system
-                    if label in ['POSITIVE', 'LABEL_2']:
-                        # Gradual scaling based on confidence
-                        if raw_score > 0.95:  # Very high confidence -> extreme positive
-                            score = 0.85 + (raw_score - 0.95) * 2.0  # 0.85 to 0.95
-                        elif raw_score > 0.9:   # High confidence -> strong positive
-                            score = 0.7 + (raw_score - 0.9) * 3.0   # 0.7 to 0.85
-                        elif raw_score > 0.8:   # Medium-high confidence -> moderate-strong positive
-                            score = 0.5 + (raw_score - 0.8) * 2.0   # 0.5 to 0.7
-                        elif raw_score > 0.65:  # Medium confidence -> moderate positive
-                            score = 0.3 + (raw_score - 0.65) * 1.33 # 0.3 to 0.5
-                        else:  # Lower confidence -> mild positive
-                            score = raw_score * 0.46  # 0 to 0.3
-                    elif label in ['NEGATIVE', 'LABEL_0']:
-                        # Mirror for negative scores
-                        if raw_score > 0.95:  # Very high confidence -> extreme negative
-                            score = -0.85 - (raw_score - 0.95) * 2.0  # -0.85 to -0.95
-                        elif raw_score > 0.9:   # High confidence -> strong negative
-                            score = -0.7 - (raw_score - 0.9) * 3.0    # -0.7 to -0.85
-                        elif raw_score > 0.8:   # Medium-high confidence -> moderate-strong negative
-                            score = -0.5 - (raw_score - 0.8) * 2.0    # -0.5 to -0.7
-                        elif raw_score > 0.65:  # Medium confidence -> moderate negative
-                            score = -0.3 - (raw_score - 0.65) * 1.33  # -0.3 to -0.5
-                        else:  # Lower confidence -> mild negative
-                            score = -raw_score * 0.46  # 0 to -0.3
-                    else:
-                        score = 0
-                else:
-                    score = 0
-            else:
-                score = 0
-            scores.append(score)
-        except Exception as e:
-            print(f"Error processing sentence: {e}", file=sys.stderr)
-            scores.append(0)
+        return [sent.text.strip() for sent in doc.sents if sent.text.strip()] or [processed_text]
+    return [processed_text]
+
+# One-word ASCII sentences ("ok.", "thanks!") are scored by keywords instead of a forward pass.
+# Emoji and other non-ASCII content carry sentiment the keyword tables can't see, so they always
+# go to the model, as do sentences with no word at all
+FAST_PATH_MAX_WORDS = 1
+_RE_WORD = re.compile(r'[A-Za-z]+')
 
+def is_trivial_sentence(sentence):
+    return sentence.isascii() and 1 <= len(_RE_WORD.findall(sentence)) <= FAST_PATH_MAX_WORDS
+
+def score_sentences(sentiment_model, sentences):
+    """Score per sentence: keywords for trivial ones, padded model forward passes for the rest"""
+    scores = [0.0] * len(sentences)
+    neural = []
+    for i, sentence in enumerate(sentences):
+        if is_trivial_sentence(sentence):
+            scores[i] = get_keyword_sentiment_fallback(sentence)
+        else:
+            neural.append(i)
+    if not neural:
+        return scores
+    
+    try:
+        # Length-sorted input makes each mini-batch pad to similar lengths; results are put back in order
+        neural.sort(key=lambda i: len(sentences[i]))
+        results = sentiment_model(
+            [sentences[i] for i in neural],
+            batch_size=min(SENTENCE_BATCH_SIZE, len(neural)),
+            truncation=True,
+            max_length=MAX_TOKENS
+        )
+        for i, result in zip(neural, results):
+            scores[i] = get_sentence_score([result])
+    except Exception as e:
+        print(f"Error processing sentence batch, scoring one at a time: {e}", file=sys.stderr)
+        for i in neural:
+            try:
+                scores[i] = get_sentence_score(sentiment_model(sentences[i]))
+            except Exception as e:
+                print(f"Error processing sentence: {e}", file=sys.stderr)
+                scores[i] = 0
+    return scores
+
+def combine_sentence_scores(text, scores):
+    """Final sentiment of text from its sentence scores, emotion boost and overrides"""
     base_sentiment = np.mean(scores) if scores else 0
     # More balanced scaling
     base_sentiment = np.tanh(base_sentiment * 0.9)
 
-    critical_boost = get_critical_emotion_boost(text)
+    text_lower = text.lower()
+    critical_boost = get_critical_emotion_boost(text, text_lower)
     # More conservative boost application
     final_sentiment = float(np.clip(base_sentiment + critical_boost * 0.5, -0.95, 0.95))
     
     # Apply specific corrections for problematic moderate cases
-    text_lower = text.lower()
-    
     # Handle patterns that need careful tuning for moderate emotions
-    if 'tired but' in text_lower and 'proud' in text_lower:
-        final_sentiment = 0.2   # Mixed positive, slight lean
-    elif 'stressful but' in text_lower and 'enjoyed' in text_lower:
-        final_sentiment = 0.05  # Nearly balanced
-    elif 'down but hopeful' in text_lower:
-        final_sentiment = 0.0   # Perfect balance
-    elif 'hopeful and scared' in text_lower or ('hopeful' in text_lower and 'scared' in text_lower):
-        final_sentiment = 0.1   # Slight positive lean
-    elif 'mixed bag' in text_lower:
-        final_sentiment = 0.05  # Slight positive for mixed
-    elif 'bored out of my mind' in text_lower:
-        final_sentiment = -0.4  # Moderate negative, not extreme
-    elif 'this sucks but' in text_lower and ('deal' in text_lower or 'cope' in text_lower):
-        final_sentiment = -0.3  # Negative but coping
-    elif 'completely overwhelmed' in text_lower:
-        final_sentiment = -0.7  # Strong but not extreme
-    elif 'calm and peaceful' in text_lower:
-        final_sentiment = 0.7   # Strong positive but not extreme
-    elif 'grateful for small wins' in text_lower:
-        final_sentiment = 0.7   # Positive gratitude
-    elif 'guess things are okay' in text_lower:
-        final_sentiment = 0.1   # Mild positive with hesitation
-    elif 'not too bad' in text_lower and 'suppose' in text_lower:
-        final_sentiment = 0.15  # Mildly positive with reservation
-    elif 'could be worse' in text_lower:
-        final_sentiment = 0.1   # Resigned optimism
-    # Fix the remaining edge cases
-    elif 'bittersweet' in text_lower:
-        final_sentiment = 0.0   # Perfect balance - override AI bias
-    elif 'want to curl up and cry' in text_lower or 'curl up and cry' in text_lower:
-        final_sentiment = -0.9  # Strong sadness
-    elif "don't care anymore" in text_lower:
-        final_sentiment = -0.6  # Apathy with negative undertones
-    elif 'just my luck' in text_lower and 'lol' in text_lower:
-        final_sentiment = -0.4  # Sarcastic negative - override AI positivity bias
+    final_sentiment = apply_overrides(MODEL_OVERRIDES, locate_override_phrases(text_lower), final_sentiment)
     
     return final_sentiment
 
+def is_blank(text):
+    return not text or not isinstance(text, str) or len(text.strip()) == 0
+
+@memoize_text
+def get_sentiment(text):
+    if is_blank(text):
+        return 0.0
+    sentiment_model = get_sentiment_model()
+
+    # If transformers model is not available, use keyword-based fallback
+    if sentiment_model is None:
+        return get_fallback_sentiment(text)
+
+    return combine_sentence_scores(text, score_sentences(sentiment_model, split_sentences(text)))
+
+def get_sentiments(texts):
+    """get_sentiment for many texts, scoring the sentences of all of them in shared forward passes"""
+    sentiment_model = get_sentiment_model()
+    if sentiment_model is None:
+        return [0.0 if is_blank(text) else get_fallback_sentiment(text) for text in texts]
+    
+    sentences_per_text = [[] if is_blank(text) else split_sentences(text) for text in texts]
+    all_scores = score_sentences(sentiment_model, [sentence for sentences in sentences_per_text for sentence in sentences])
+    results = []
+    offset = 0
+    for text, sentences in zip(texts, sentences_per_text):
+        if not sentences:
+            results.append(0.0)
+            continue
+        results.append(combine_sentence_scores(text, all_scores[offset:offset + len(sentences)]))
+        offset += len(sentences)
+    return results
+
+# -------------------------
+# Server mode: one long-lived process (models loaded once) that micro-batches concurrent requests
+# -------------------------
+SERVE_PORT = int(os.getenv("SENTIMENT_PORT", "8002"))
+SERVE_MAX_BATCH = int(os.getenv("SENTIMENT_MAX_BATCH", "32"))
+SERVE_MAX_WAIT_MS = float(os.getenv("SENTIMENT_BATCH_WAIT_MS", "20"))  # Longest a request waits for batch-mates
+
+def serve():
+    """Run the FastAPI/uvicorn server; concurrent /analyze texts share get_sentiments calls"""
+    import asyncio
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI
+    from pydantic import BaseModel
+    import uvicorn
+
+    class TextInput(BaseModel):
+        text: str
+
+    queue = None  # asyncio.Queue of (text, future), created on the server's loop in lifespan
+
+    async def batch_worker():
+        """Drain up to SERVE_MAX_BATCH queued texts (waiting at most SERVE_MAX_WAIT_MS) and score them together"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + SERVE_MAX_WAIT_MS / 1000
+            while len(batch) < SERVE_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                scores = await loop.run_in_executor(None, get_sentiments, [text for text, _ in batch])
+                for (_, future), score in zip(batch, scores):
+                    if not future.done():
+                        future.set_result(score)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        nonlocal queue
+        await asyncio.get_running_loop().run_in_executor(None, ensure_models_loaded)
+        queue = asyncio.Queue()
+        worker = asyncio.create_task(batch_worker())
+        yield
+        worker.cancel()
+
+    app = FastAPI(title="Sarang Sentiment Analysis", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "sentiment_model": _sentiment_model is not None}
+
+    @app.post("/analyze")
+    async def analyze(input_data: TextInput):
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((input_data.text, future))
+        return {"sentiment_score": float(await future), "text": input_data.text}
+
+    uvicorn.run(app, host="0.0.0.0", port=SERVE_PORT, log_level="info")
+
 # -------------------------
-# Main
+# Main: `--serve` runs the HTTP server, otherwise one JSON request is read from stdin
 # -------------------------
 if __name__ == "__main__":
+    if "--serve" in sys.argv[1:]:
+        serve()
+        sys.exit(0)
     try:
         input_data = json.loads(sys.stdin.read())
         text = input_data.get('text', '')
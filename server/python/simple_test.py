@@ -5,20 +5,73 @@ Tests sentiment accuracy without requiring heavy AI models
 """
 
 import asyncio
+import logging
+import queue
 import sys
 import os
+import numpy as np
+from heapq import nlargest
+from logging.handlers import QueueHandler, QueueListener
+from operator import itemgetter
+from typing import NamedTuple
+
+# --json prints one JSON document (every suite's cases and summary) on stdout; everything
+# human-readable, including the analyzers' own prints, goes to stderr instead
+JSON_OUTPUT = "--json" in sys.argv[1:]
+if JSON_OUTPUT:
+    json_stream, sys.stdout = sys.stdout, sys.stderr
+json_report = {}
 
 try:
-    from improved_mood_ai import ultra_advanced_analyze_mood
+    from improved_mood_ai import ultra_advanced_analyze_mood, ultra_advanced_analyze_mood_batch
     ADVANCED_MODE = True
 except ImportError:
     print("⚠️  Advanced mood AI not available, testing sentiment analysis only")
     ADVANCED_MODE = False
 
-from sentiment_analysis import get_sentiment
+from sentiment_analysis import get_sentiment, get_keyword_sentiment_fallback, score_sentences
+
+# Report output goes through a queue drained by a listener thread, so the coroutines never
+# block the event loop on writes to stdout (stderr with --json)
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger("simple_test")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+logger.addHandler(QueueHandler(_log_queue))
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+log_listener = QueueListener(_log_queue, _stdout_handler)
+
+# Per-case report blocks, formatted in one call per case
+_TMPL = (
+    "\n[{i:2d}] {text}\n"
+    "     Expected: Sentiment={exp_s:+.2f}, Mood={exp_m}\n"
+    "     Got:      Sentiment={got_s:+.2f}, Mood={got_m}\n"
+    "     Status:   {status} Sentiment {sent_mark} | Mood {mood_mark}\n"
+    "     Notes:    {notes}"
+)
+_SIMPLE_TMPL = (
+    "\n[{i}] {text}\n"
+    "    Expected: {expected}\n"
+    "    Predicted: {predicted}\n"
+    "    Status: {status}\n"
+    "    Confidence: {confidence:.3f}\n"
+    "    Sentiment: {sentiment:.3f}\n"
+    "    Intensity: {intensity}"
+)
+
+class TC(NamedTuple):
+    text: str
+    expected_sentiment: float
+    expected_mood: str
+    notes: str
+
+class SimpleCase(NamedTuple):
+    text: str
+    expected: str
 
 # Comprehensive test cases from user requirements
-TEST_CASES = [
+_RAW_TEST_CASES = [
     {"text": "I feel amazing today!", "expected_sentiment": 0.85, "expected_mood": "joy", "notes": "Strong positive tone"},
     {"text": "Everything is going wrong", "expected_sentiment": -0.85, "expected_mood": "sadness", "notes": "Strong negative tone"},
     {"text": "I am so tired but also kind of proud", "expected_sentiment": 0.2, "expected_mood": "mixed_positive", "notes": "Conflicting feelings"},
@@ -60,79 +113,191 @@ TEST_CASES = [
     {"text": "This sucks but I'll deal with it", "expected_sentiment": -0.3, "expected_mood": "resigned", "notes": "Negative but coping"},
     {"text": "Happy tears", "expected_sentiment": 0.7, "expected_mood": "joy", "notes": "Positive with emotional tone"}
 ]
+TEST_CASES = [TC(**raw_case) for raw_case in _RAW_TEST_CASES]
+
+# Column views of TEST_CASES so the pass/fail checks run as whole-array comparisons
+TEXTS = [test_case.text for test_case in TEST_CASES]
+EXPECTED_SENT = np.fromiter((test_case.expected_sentiment for test_case in TEST_CASES), dtype=np.float64, count=len(TEST_CASES))
+EXPECTED_MOOD = np.array([test_case.expected_mood for test_case in TEST_CASES], dtype=object)
+
+def _ell(s, n=50):
+    """Shorten s to at most n characters, marking the cut with an ellipsis"""
+    return s if len(s) <= n else f"{s[:n-1]}…"
+
+DISPLAY_TEXTS = [_ell(text) for text in TEXTS]
+
+# (sentence, whether it must reach the model): emoji-only and two-word sentences keep their model
+# score, only one-word ASCII sentences take the keyword fast path
+FAST_PATH_CASES = [
+    ("😄", True),
+    ("😭😭😭", True),
+    ("🤷‍♂️ whatever", True),
+    ("Happy tears", True),
+    ("Completely overwhelmed", True),
+    ("ok.", False),
+    ("thanks!", False)
+]
+
+def fast_path_test():
+    """Pin which sentences score_sentences answers by keywords instead of a forward pass"""
+    # Every sentence that reaches this stand-in model is 97% positive, i.e. scores 0.89
+    def fixed_model(inputs, **kwargs):
+        if isinstance(inputs, str):
+            return [{"label": "LABEL_2", "score": 0.97}]
+        return [{"label": "LABEL_2", "score": 0.97} for _ in inputs]
+    
+    sentences = [sentence for sentence, _ in FAST_PATH_CASES]
+    scores = score_sentences(fixed_model, sentences)
+    
+    passed = 0
+    records = []
+    for (sentence, uses_model), score in zip(FAST_PATH_CASES, scores):
+        expected = 0.89 if uses_model else get_keyword_sentiment_fallback(sentence)
+        ok = abs(score - expected) < 1e-9
+        passed += ok
+        logger.info(f"{'✅' if ok else '❌'} {sentence!r}: expected {expected:+.2f} ({'model' if uses_model else 'keywords'}), got {score:+.2f}")
+        if JSON_OUTPUT:
+            records.append({"sentence": sentence, "uses_model": uses_model, "expected": expected, "score": score, "ok": ok})
+    
+    logger.info(f"📊 Fast Path Routing: {passed}/{len(FAST_PATH_CASES)}")
+    if JSON_OUTPUT:
+        json_report["fast_path"] = {"cases": records, "summary": {"passed": passed, "total": len(FAST_PATH_CASES)}}
+    return passed, len(FAST_PATH_CASES)
 
 async def comprehensive_test():
     """Run comprehensive test suite with detailed analysis"""
-    print("🚀 COMPREHENSIVE MOOD DETECTION TEST SUITE")
-    print("=" * 60)
-    print(f"Testing {len(TEST_CASES)} comprehensive test cases...")
-    print("=" * 60)
+    logger.info("🚀 COMPREHENSIVE MOOD DETECTION TEST SUITE")
+    logger.info("=" * 60)
+    logger.info(f"Testing {len(TEST_CASES)} comprehensive test cases...")
+    logger.info("=" * 60)
     
-    passed_sentiment = 0
-    passed_mood = 0
     total_tests = len(TEST_CASES)
     
-    for i, test_case in enumerate(TEST_CASES, 1):
+    # Score everything up front (all cases go through the analyzer together so the AI models
+    # see one batch), then the loop below only reports. Repeated texts are scored once and
+    # scattered back to every case that uses them
+    unique_texts = list(dict.fromkeys(TEXTS))
+    sentiment_by_text = {}
+    for text in unique_texts:
         try:
-            # Test both basic sentiment analysis and advanced mood detection
-            basic_sentiment = get_sentiment(test_case["text"])
-            advanced_result = await ultra_advanced_analyze_mood(test_case["text"])
-            
-            # Check sentiment accuracy (within 0.2 tolerance)
-            sentiment_diff = abs(basic_sentiment - test_case["expected_sentiment"])
-            sentiment_passed = sentiment_diff <= 0.2
-            
-            # Check mood accuracy (exact match for primary emotion)
-            mood_passed = advanced_result["primary_emotion"] == test_case["expected_mood"]
-            
-            if sentiment_passed:
-                passed_sentiment += 1
-            if mood_passed:
-                passed_mood += 1
+            sentiment_by_text[text] = get_sentiment(text)
+        except Exception as e:
+            sentiment_by_text[text] = e  # Kept in the text's slot; NaN below fails its tolerance check
+    sentiment_results = [sentiment_by_text[text] for text in TEXTS]
+    basic_sentiments = np.fromiter(
+        (np.nan if isinstance(sentiment, Exception) else sentiment for sentiment in sentiment_results),
+        dtype=np.float64, count=total_tests
+    )
+    # A text whose analysis fails gets its exception in its slot; the case's own try reports it
+    result_by_text = dict(zip(unique_texts, await ultra_advanced_analyze_mood_batch(unique_texts, return_exceptions=True)))
+    advanced_results = [result_by_text[text] for text in TEXTS]
+    moods = np.array([
+        None if isinstance(advanced_result, Exception) else advanced_result["primary_emotion"]
+        for advanced_result in advanced_results
+    ], dtype=object)
+    
+    # Sentiment within 0.2 tolerance, mood an exact match for the primary emotion
+    sentiment_ok = np.abs(basic_sentiments - EXPECTED_SENT) <= 0.2
+    mood_ok = moods == EXPECTED_MOOD
+    passed_sentiment = int(sentiment_ok.sum())
+    passed_mood = int(mood_ok.sum())
+    both_ok = sentiment_ok & mood_ok
+    either_ok = sentiment_ok | mood_ok
+    passed_both = int(both_ok.sum())
+    passed_either = int(either_ok.sum())
+    passed_neither = total_tests - passed_either
+    statuses = np.where(both_ok, "✅", np.where(either_ok, "⚠️", "❌"))
+    
+    # Each case appends its lines here; the whole report is written in one go after the loop
+    report = []
+    records = []
+    for i, ((text, expected_sentiment, expected_mood, notes), sentiment_result, basic_sentiment, advanced_result) in enumerate(
+        zip(TEST_CASES, sentiment_results, basic_sentiments, advanced_results), 1
+    ):
+        try:
+            # Scoring ran before the loop; a failure stored in this case's slot is reported here as its ERROR
+            for outcome in (sentiment_result, advanced_result):
+                if isinstance(outcome, Exception):
+                    raise outcome
+            sentiment_passed = sentiment_ok[i - 1]
+            mood_passed = mood_ok[i - 1]
+            status = statuses[i - 1]
             
-            status = "✅" if (sentiment_passed and mood_passed) else "⚠️" if (sentiment_passed or mood_passed) else "❌"
+            if JSON_OUTPUT:
+                records.append({
+                    "text": text, "expected_sentiment": expected_sentiment, "expected_mood": expected_mood,
+                    "sentiment": float(basic_sentiment), "mood": advanced_result["primary_emotion"],
+                    "sentiment_ok": bool(sentiment_passed), "mood_ok": bool(mood_passed)
+                })
             
-            print(f"\n[{i:2d}] {test_case['text'][:50]}{'...' if len(test_case['text']) > 50 else ''}")
-            print(f"     Expected: Sentiment={test_case['expected_sentiment']:+.2f}, Mood={test_case['expected_mood']}")
-            print(f"     Got:      Sentiment={basic_sentiment:+.2f}, Mood={advanced_result['primary_emotion']}")
-            print(f"     Status:   {status} Sentiment {'✓' if sentiment_passed else '✗'} | Mood {'✓' if mood_passed else '✗'}")
-            print(f"     Notes:    {test_case['notes']}")
+            report.append(_TMPL.format(
+                i=i, text=DISPLAY_TEXTS[i - 1],
+                exp_s=expected_sentiment, exp_m=expected_mood,
+                got_s=basic_sentiment, got_m=advanced_result['primary_emotion'],
+                status=status, sent_mark='✓' if sentiment_passed else '✗', mood_mark='✓' if mood_passed else '✗',
+                notes=notes
+            ))
             
             if not (sentiment_passed and mood_passed):
-                print(f"     Debug:    Confidence={advanced_result['confidence']:.3f}, Intensity={advanced_result['intensity_level']}")
+                report.append(f"     Debug:    Confidence={advanced_result['confidence']:.3f}, Intensity={advanced_result['intensity_level']}")
                 
         except Exception as e:
-            print(f"\n[{i:2d}] ❌ ERROR: {test_case['text']}")
-            print(f"     Exception: {str(e)}")
+            if JSON_OUTPUT:
+                records.append({"text": text, "error": str(e)})
+            report.append(f"\n[{i:2d}] ❌ ERROR: {text}")
+            report.append(f"     Exception: {str(e)}")
     
-    print("\n" + "=" * 60)
-    print("FINAL RESULTS:")
-    print(f"Sentiment Accuracy: {passed_sentiment}/{total_tests} ({passed_sentiment/total_tests*100:.1f}%)")
-    print(f"Mood Accuracy:      {passed_mood}/{total_tests} ({passed_mood/total_tests*100:.1f}%)")
-    print(f"Combined Accuracy:  {min(passed_sentiment, passed_mood)}/{total_tests} ({min(passed_sentiment, passed_mood)/total_tests*100:.1f}%)")
-    print("=" * 60)
+    logger.info("\n".join(report))
     
+    logger.info("\n" + "=" * 60)
+    logger.info("FINAL RESULTS:")
+    logger.info(f"Sentiment Accuracy: {passed_sentiment}/{total_tests} ({passed_sentiment/total_tests*100:.1f}%)")
+    logger.info(f"Mood Accuracy:      {passed_mood}/{total_tests} ({passed_mood/total_tests*100:.1f}%)")
+    logger.info(f"Combined Accuracy:  {passed_both}/{total_tests} ({passed_both/total_tests*100:.1f}%)")
+    logger.info(f"Either Passed:      {passed_either}/{total_tests} ({passed_either/total_tests*100:.1f}%)")
+    logger.info(f"Neither Passed:     {passed_neither}/{total_tests} ({passed_neither/total_tests*100:.1f}%)")
+    logger.info("=" * 60)
+    
+    if JSON_OUTPUT:
+        json_report["comprehensive"] = {
+            "cases": records,
+            "summary": {
+                "total": total_tests, "passed_sentiment": passed_sentiment, "passed_mood": passed_mood,
+                "passed_both": passed_both, "passed_either": passed_either, "passed_neither": passed_neither
+            }
+        }
     return passed_sentiment, passed_mood, total_tests
 
 async def simple_test():
     """Simple test with clear expected results"""
     test_cases = [
-        {"text": "I am absolutely thrilled about this amazing opportunity!", "expected": "excitement"},
-        {"text": "I'm feeling blue today", "expected": "sadness"},
-        {"text": "I'm completely exhausted and overwhelmed", "expected": "exhaustion"},
-        {"text": "I'm over the moon about this news!", "expected": "excitement"},
-        {"text": "My therapist says I'm making great progress", "expected": "optimism"}
+        SimpleCase("I am absolutely thrilled about this amazing opportunity!", "excitement"),
+        SimpleCase("I'm feeling blue today", "sadness"),
+        SimpleCase("I'm completely exhausted and overwhelmed", "exhaustion"),
+        SimpleCase("I'm over the moon about this news!", "excitement"),
+        SimpleCase("My therapist says I'm making great progress", "optimism")
     ]
     
-    print("\n🚀 Simple Mood Detection Test")
-    print("=" * 50)
+    logger.info("\n🚀 Simple Mood Detection Test")
+    logger.info("=" * 50)
+    
+    # Issue every distinct analysis at once; failures come back as exception objects in their slot
+    texts = [test_case.text for test_case in test_cases]
+    unique_texts = list(dict.fromkeys(texts))
+    unique_results = await asyncio.gather(
+        *(ultra_advanced_analyze_mood(text) for text in unique_texts), return_exceptions=True
+    )
+    result_by_text = dict(zip(unique_texts, unique_results))
+    results = [result_by_text[text] for text in texts]
     
     correct = 0
-    for i, test_case in enumerate(test_cases, 1):
+    report = []
+    records = []
+    for i, ((text, expected), result) in enumerate(zip(test_cases, results), 1):
         try:
-            result = await ultra_advanced_analyze_mood(test_case["text"])
+            if isinstance(result, Exception):
+                raise result
             predicted = result["primary_emotion"]
-            expected = test_case["expected"]
             is_correct = predicted == expected
             
             if is_correct:
@@ -141,71 +306,98 @@ async def simple_test():
             else:
                 status = "❌ WRONG"
             
-            print(f"\n[{i}] {test_case['text']}")
-            print(f"    Expected: {expected}")
-            print(f"    Predicted: {predicted}")
-            print(f"    Status: {status}")
-            print(f"    Confidence: {result['confidence']:.3f}")
-            print(f"    Sentiment: {result['sentiment_score']:.3f}")
-            print(f"    Intensity: {result['intensity_level']}")
+            if JSON_OUTPUT:
+                records.append({
+                    "text": text, "expected": expected, "predicted": predicted, "correct": is_correct,
+                    "confidence": result['confidence'], "sentiment": result['sentiment_score'],
+                    "intensity": result['intensity_level']
+                })
+            
+            report.append(_SIMPLE_TMPL.format(
+                i=i, text=text, expected=expected, predicted=predicted, status=status,
+                confidence=result['confidence'], sentiment=result['sentiment_score'],
+                intensity=result['intensity_level']
+            ))
             
             # Show detailed analysis for debugging
             if not is_correct:
-                print(f"    🔍 Debug Info:")
+                report.append(f"    🔍 Debug Info:")
                 if 'analysis_details' in result:
                     emotions = result['analysis_details']['emotion_scores']
-                    print(f"        All emotions detected: {emotions}")
-                    print(f"        Context: {result.get('context_detected', 'None')}")
+                    report.append(f"        All emotions detected: {emotions}")
+                    report.append(f"        Context: {result.get('context_detected', 'None')}")
                     
                     # Show top 3 emotions with scores
-                    sorted_emotions = sorted(emotions.items(), key=lambda x: x[1], reverse=True)[:3]
-                    print(f"        Top 3 emotions: {sorted_emotions}")
+                    sorted_emotions = nlargest(3, emotions.items(), key=itemgetter(1))
+                    report.append(f"        Top 3 emotions: {sorted_emotions}")
         
         except Exception as e:
-            print(f"\n[{i}] ERROR: {str(e)}")
-            print(f"    Text: {test_case['text']}")
-            import traceback
-            traceback.print_exc()
+            if JSON_OUTPUT:
+                records.append({"text": text, "error": str(e)})
+            report.append(f"\n[{i}] ERROR: {str(e)}")
+            report.append(f"    Text: {text}")
+            logger.exception(f"Traceback for case [{i}]:")
+    
+    logger.info("\n".join(report))
     
     accuracy = (correct / len(test_cases)) * 100
-    print(f"\n📊 Simple Test Accuracy: {accuracy:.1f}% ({correct}/{len(test_cases)})")
+    logger.info(f"\n📊 Simple Test Accuracy: {accuracy:.1f}% ({correct}/{len(test_cases)})")
     
     if accuracy >= 90:
-        print("🎯 Excellent! Target accuracy achieved!")
+        logger.info("🎯 Excellent! Target accuracy achieved!")
     elif accuracy >= 80:
-        print("👍 Good! Close to target accuracy.")
+        logger.info("👍 Good! Close to target accuracy.")
     else:
-        print("🔄 Needs improvement.")
+        logger.info("🔄 Needs improvement.")
     
+    if JSON_OUTPUT:
+        json_report["simple"] = {
+            "cases": records,
+            "summary": {"correct": correct, "total": len(test_cases), "accuracy": accuracy}
+        }
     return correct, len(test_cases)
 
-if __name__ == "__main__":
-    # Test a quick sample first
-    print("🧪 Quick Test Sample:")
-    print("-" * 30)
-    
-    # Quick test of the specific issue
-    import asyncio
-    async def quick_test():
-        try:
-            text = "My therapist says I'm making great progress"
-            result = await ultra_advanced_analyze_mood(text)
-            print(f"Text: {text}")
-            print(f"Predicted mood: {result['primary_emotion']}")
-            print(f"Sentiment: {result['sentiment_score']:.3f}")
-            print(f"All emotions: {result.get('analysis_details', {}).get('emotion_scores', {})}")
-        except Exception as e:
-            print(f"Quick test error: {e}")
-            import traceback
-            traceback.print_exc()
+async def quick_test():
+    """Quick test of the specific issue"""
+    try:
+        text = "My therapist says I'm making great progress"
+        result = await ultra_advanced_analyze_mood(text)
+        logger.info(f"Text: {text}")
+        logger.info(f"Predicted mood: {result['primary_emotion']}")
+        logger.info(f"Sentiment: {result['sentiment_score']:.3f}")
+        logger.info(f"All emotions: {result.get('analysis_details', {}).get('emotion_scores', {})}")
+    except Exception as e:
+        logger.exception(f"Quick test error: {e}")
+
+async def main():
+    """Run every suite on one event loop, so caches and loaded models carry over between them"""
+    # The quick sample repeats a case the suites already cover, so it only runs on request
+    if os.getenv("SARANG_QUICK_TEST"):
+        logger.info("🧪 Quick Test Sample:")
+        logger.info("-" * 30)
+        await quick_test()
+        logger.info("\n")
     
-    asyncio.run(quick_test())
-    print("\n")
+    logger.info("🧭 Sentence Fast Path Routing")
+    logger.info("=" * 50)
+    fast_path_test()
+    logger.info("")
     
     # Run comprehensive test first, then simple test
-    asyncio.run(comprehensive_test())
-    simple_correct, simple_total = asyncio.run(simple_test())
+    await comprehensive_test()
+    simple_correct, simple_total = await simple_test()
+    
+    logger.info(f"\n🎯 OVERALL SUMMARY:")
+    logger.info(f"Simple Test: {(simple_correct/simple_total)*100:.1f}% accuracy")
+    logger.info("Run complete!")
     
-    print(f"\n🎯 OVERALL SUMMARY:")
-    print(f"Simple Test: {(simple_correct/simple_total)*100:.1f}% accuracy")
-    print("Run complete!")
+    if JSON_OUTPUT:
+        import orjson
+        json_stream.write(orjson.dumps(json_report).decode() + "\n")
+
+if __name__ == "__main__":
+    log_listener.start()
+    try:
+        asyncio.run(main())
+    finally:
+        log_listener.stop()
@@ -8,7 +8,6 @@ import sys
 import os
 import signal
 import asyncio
-import subprocess
 import time
 from pathlib import Path
 
@@ -21,27 +20,12 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 def check_dependencies():
-    """Check if all required dependencies are available"""
-    print("🔍 Checking dependencies...")
-    
-    required_packages = [
-        'fastapi', 'uvicorn', 'pydantic', 're', 'asyncio', 'time', 'logging'
-    ]
-    
-    missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package)
-            print(f"  ✅ {package}")
-        except ImportError:
-            missing_packages.append(package)
-            print(f"  ❌ {package} - MISSING")
-    
-    if missing_packages:
-        print(f"⚠️ Missing packages: {', '.join(missing_packages)}")
-        print("Installing missing packages...")
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install'] + missing_packages)
-    
+    """Fail fast if a third-party package the service needs is missing (stdlib modules are always there)"""
+    try:
+        import fastapi, uvicorn, pydantic
+    except ImportError as e:
+        # Install requirements.txt ahead of time; the service does not pip-install into itself
+        sys.exit(f"❌ Missing required package: {e.name}")
     return True
 
 def start_service():
@@ -57,17 +41,18 @@ def start_service():
         # Check dependencies
         check_dependencies()
         
-        # Import and start the service
-        from production_mood_service import app
         import uvicorn
         
         # Configuration
         host = os.getenv('MOOD_SERVICE_HOST', '0.0.0.0')
         port = int(os.getenv('MOOD_SERVICE_PORT', 5001))
+        # Each worker is a separate process (own GIL, own copy of the models)
+        workers = int(os.getenv('MOOD_WORKERS', min(4, os.cpu_count() or 1)))
         
         print(f"🌟 Service Configuration:")
         print(f"   📡 Host: {host}")
         print(f"   🔌 Port: {port}")
+        print(f"   👷 Workers: {workers}")
         print(f"   🎯 Accuracy: 81%+")
         print(f"   🤖 Model: Ultra-Advanced AI v4.0")
         print("=" * 60)
@@ -83,13 +68,19 @@ def start_service():
         print("\nPress Ctrl+C to stop the service")
         print("=" * 60)
         
-        # Start the service
+        # Start the service; multiple workers need an import string, a single one can take the app object
+        if workers > 1:
+            app = "production_mood_service:app"
+        else:
+            from production_mood_service import app
         uvicorn.run(
             app,
+            app_dir=str(current_dir),
             host=host,
             port=port,
+            workers=workers,
             log_level="info",
-            access_log=True,
+            access_log=False,  # Per-request log lines cost more than they tell in production
             reload=False  # Disable reload for production
         )
         